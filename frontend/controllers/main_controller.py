@@ -82,6 +82,7 @@ def MainController(args, preview_widget=None, on_frame: Optional[Callable] = Non
         if ticker is not None:
             ticker.cancel()
         cam.release()
+        pipe.close()
 
     return shutdown
 
@@ -226,6 +226,8 @@ class MyApp(MDApp):
         if self.controller:
             self.controller()
             self.controller = None
+        if self.progress_session_manager:
+            self.progress_session_manager.close()
 
     def edit_profile(self):
         if not self.db_path:
@@ -162,6 +162,25 @@ def upsert_pose_photo(
         conn.commit()
 
 
+def delete_pose_photo(
+    db_path: str | Path, session_id: int, pose_index: int, photo_path: str
+) -> None:
+    """
+    Remove a pose photo entry if it still points at *photo_path*.
+
+    Used when writing the image fails after the entry was recorded.
+    """
+    with _connect(db_path) as conn:
+        conn.execute(
+            """
+            DELETE FROM pose_photos
+            WHERE session_id = ? AND pose_index = ? AND photo_path = ?
+            """,
+            (session_id, pose_index, photo_path),
+        )
+        conn.commit()
+
+
 def fetch_pose_photos_for_session(
     db_path: str | Path, session_id: int
 ) -> list[tuple[int, str, float | None]]:
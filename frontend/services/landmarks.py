@@ -2,6 +2,11 @@
 # Purpose: Face landmark utilities and detectors built on MediaPipe FaceMesh
 # Created: 2025-10-05
 
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+from typing import Sequence
+
+import cv2
 import mediapipe as mp
 import numpy as np
 from kivy.graphics.texture import Texture
@@ -9,7 +14,36 @@ from kivy.graphics.texture import Texture
 from services.config import Config
 from services import nodes
 
+# while no face is visible, frames are first searched at this width
+_PROBE_WIDTH = 256
+
+_X = attrgetter("x")
+_Y = attrgetter("y")
+_Z = attrgetter("z")
+
+# cv2 conversion into packed RGB per texture color format (None: already RGB)
+_TO_RGB = {
+    "rgba": cv2.COLOR_RGBA2RGB,
+    "bgra": cv2.COLOR_BGRA2RGB,
+    "bgr": cv2.COLOR_BGR2RGB,
+    "rgb": None,
+}
+
 class FaceMeshDetector():
+    # fixed attribute set: slot access on the per-frame path instead of
+    # instance __dict__ lookups
+    __slots__ = (
+        "_face_mesh",
+        "cfg",
+        "_smooth_landmarks",
+        "_alpha",
+        "_one_minus_alpha",
+        "_rgb_buf",
+        "_last_had_face",
+        "_probe_buf",
+        "_fmt_cache",
+    )
+
     def __init__(self, cfg:Config):
         
         # setup MediaPipe FaceMesh with configuration from Config definition
@@ -26,18 +60,51 @@ class FaceMeshDetector():
         # Intialize to no previous landmarks for smoothing
         self._smooth_landmarks = None
 
-    # detect will return landmarks in (x, y, z) normalized coordinates
+        # smoothing weights are fixed; keep them float32 so the EMA never upcasts
+        self._alpha = np.float32(cfg.mp.smoothing_alpha)
+        self._one_minus_alpha = np.float32(1.0 - cfg.mp.smoothing_alpha)
+
+        # RGB frame reused by detect(); allocated on the first frame
+        self._rgb_buf = None
+
+        # while the previous frame had no face, search a downscaled copy first
+        self._last_had_face = True
+        self._probe_buf = None
+
+        # (texture, cv2 conversion code) for the last texture seen; a live camera
+        # keeps handing over the same texture object, whose colorfmt is fixed
+        self._fmt_cache = None
+
+    # detect will return landmarks in (x, y, z) normalized coordinates, shape (N, 3)
     # or None if no face is detected
     # returned as np.ndarray
     # will have to apply (w,h) multiplication outside to get pixel coordinates
     def detect(self, frame:Texture) -> np.ndarray:
 
         # Convert Kivy Texture to RGB numpy array for MediaPipe processing
-        frame = self._texture_to_rgb_array(frame)
-        
+        self._rgb_buf = self.texture_to_rgb(frame, out=self._rgb_buf)
+        return self.detect_rgb(self._rgb_buf)
+
+    # texture_to_rgb reads the pixels back from the GPU, so it must run on the
+    # GL (UI) thread; the returned array can then be handed to detect_rgb on
+    # any single worker thread
+    # pass a previously returned array as `out` to reuse it instead of allocating
+    def texture_to_rgb(self, frame:Texture, out:np.ndarray | None = None) -> np.ndarray:
+        return self._texture_to_rgb_array(frame, out)
+
+    def detect_rgb(self, frame:np.ndarray) -> np.ndarray:
+
+        # no face last time: look for one on a small copy first and only pay
+        # for full resolution once something shows up (landmarks are
+        # normalized, so the scale does not matter to MediaPipe)
+        if not self._last_had_face and frame.shape[1] > _PROBE_WIDTH:
+            if not self._face_mesh.process(self._downscale(frame)).multi_face_landmarks:
+                return None
+
         # process the image and extract landmarks
         result = self._face_mesh.process(frame)
-        
+        self._last_had_face = bool(result.multi_face_landmarks)
+
         # if no landmarks found, return None
         if not result.multi_face_landmarks:
             return None
@@ -45,53 +112,137 @@ class FaceMeshDetector():
         # extract the first face's landmarks
         landmarks = result.multi_face_landmarks[0].landmark
 
-        # convert landmarks to x, y, z coordinates
-        cur = np.asarray([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float32)
+        # convert landmarks to x, y, z coordinates, stored structure-of-arrays:
+        # shape (3, N) so each coordinate is one contiguous row
+        # (fromiter over C-level iterators; no intermediate list of tuples)
+        n = len(landmarks)
+        cur = np.stack((
+            np.fromiter(map(_X, landmarks), dtype=np.float32, count=n),
+            np.fromiter(map(_Y, landmarks), dtype=np.float32, count=n),
+            np.fromiter(map(_Z, landmarks), dtype=np.float32, count=n),
+        ))
 
         # apply landmark smoothing if needed
-        if self._smooth_landmarks is None:
+        smooth = self._smooth_landmarks
+        if smooth is None or smooth.shape != cur.shape:
             self._smooth_landmarks = cur
         else:
-            prev = self._smooth_landmarks
-            alpha = self.cfg.mp.smoothing_alpha
-            
-            # exponential moving average smoothing
-            self._smooth_landmarks = alpha * prev + (1 - alpha) * cur
-        
-        # convert normalized landmarks to pixel coordinates
-        pts = self._smooth_landmarks
-        
-        # return the landmarks
-        return pts
+            # exponential moving average smoothing, in place:
+            # smooth = alpha * smooth + (1 - alpha) * cur
+            np.multiply(smooth, self._alpha, out=smooth)
+            np.multiply(cur, self._one_minus_alpha, out=cur)
+            np.add(smooth, cur, out=smooth)
+
+        # return a snapshot; the smoothing state keeps being updated in place
+        # (possibly on another thread) while callers hold on to the result.
+        # The transpose is a view: callers get the usual (N, 3) array whose
+        # columns are contiguous in memory.
+        return self._smooth_landmarks.copy().T
     
-    @staticmethod
-    def _texture_to_rgb_array(frame: Texture) -> np.ndarray:
+    def _downscale(self, frame: np.ndarray) -> np.ndarray:
+        h, w = frame.shape[:2]
+        size = (_PROBE_WIDTH, max(1, round(h * _PROBE_WIDTH / w)))
+        buf = self._probe_buf
+        if buf is None or buf.shape[:2] != (size[1], size[0]):
+            buf = self._probe_buf = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        return cv2.resize(frame, size, dst=buf, interpolation=cv2.INTER_AREA)
+
+    def _texture_to_rgb_array(self, frame: Texture, out: np.ndarray | None = None) -> np.ndarray:
+        # every Texture attribute is a property on the Kivy side (tex_coords
+        # even builds a new tuple), so read each one exactly once
         w, h = frame.width, frame.height
-        colorfmt = frame.colorfmt.lower()
-        if colorfmt not in {"rgba", "bgra", "rgb", "bgr"}:
-            raise ValueError(f"Unsupported texture color format: {frame.colorfmt}")
+        coords = frame.tex_coords
 
-        arr = np.frombuffer(frame.pixels, dtype=np.uint8).copy()
-        arr = arr.reshape((h, w, -1))  # Kivy stores column-major (rows = height)
-        
-        flip_x = frame.tex_coords[0] > frame.tex_coords[2]
-        flip_y = frame.tex_coords[1] > frame.tex_coords[5]
-        
-        if flip_y:
-            arr = np.flipud(arr)
-        if flip_x:
-            arr = np.fliplr(arr)
-        if colorfmt in {"rgba", "bgra"}:
-            arr = arr[:, :, :3]
-        if colorfmt in {"bgra", "bgr"}:
-            arr = arr[:, :, ::-1]
+        # holding the texture in the cache also keeps its identity from being reused
+        cached = self._fmt_cache
+        if cached is None or cached[0] is not frame:
+            colorfmt = frame.colorfmt.lower()
+            if colorfmt not in _TO_RGB:
+                raise ValueError(f"Unsupported texture color format: {frame.colorfmt}")
+            cached = self._fmt_cache = (frame, _TO_RGB[colorfmt])
+
+        return _pixels_to_rgb(
+            frame.pixels,
+            w,
+            h,
+            cached[1],
+            coords[0] > coords[2],
+            coords[1] > coords[5],
+            out,
+        )
+
+
+def _pixels_to_rgb(
+    pixels: bytes,
+    w: int,
+    h: int,
+    code: int | None,
+    flip_x: bool,
+    flip_y: bool,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    src = np.frombuffer(pixels, dtype=np.uint8)
+    src = src.reshape((h, w, -1))  # Kivy stores column-major (rows = height)
+
+    if out is None or out.shape != (h, w, 3):
+        out = np.empty((h, w, 3), dtype=np.uint8)
+
+    # color conversion straight into the contiguous output buffer
+    if code is None:
+        np.copyto(out, src)
+    else:
+        cv2.cvtColor(src, code, dst=out)
+
+    # MediaPipe needs a top-left origin: GL rows are bottom-up, unless the
+    # texture is already flipped vertically. Flip in place in one pass.
+    if not flip_y:
+        cv2.flip(out, -1 if flip_x else 0, dst=out)
+    elif flip_x:
+        cv2.flip(out, 1, dst=out)
+
+    return out
+
+
+# Runs one FaceMeshDetector per input stream (e.g. several cameras) in parallel.
+# MediaPipe releases the GIL inside process(), so the inference of the
+# different detectors overlaps; only the short Python pre/post steps serialize.
+class MultiFaceMeshDetector():
+    def __init__(self, cfg:Config, count:int):
+        if count < 1:
+            raise ValueError("count must be at least 1")
+
+        # each stream needs its own detector: FaceMesh tracking and the
+        # landmark smoothing are per-stream state
+        self._detectors = [FaceMeshDetector(cfg) for _ in range(count)]
+        # per-stream RGB buffers reused by detect; safe because detect waits
+        # for every result before the next readback
+        self._rgb_bufs:list[np.ndarray | None] = [None] * count
+        self._pool = ThreadPoolExecutor(max_workers=count, thread_name_prefix="face-mesh")
+
+    def __len__(self) -> int:
+        return len(self._detectors)
+
+    # detect takes one texture per detector and returns one landmark array
+    # (or None) per texture, in the same order
+    # must be called from the GL thread, which does the pixel readback
+    def detect(self, frames:Sequence[Texture]) -> list[np.ndarray | None]:
+        if len(frames) != len(self._detectors):
+            raise ValueError(f"expected {len(self._detectors)} frames, got {len(frames)}")
 
-        # # tex_coords determine whether the texture is mirrored on the GPU
-        # if frame.tex_coords[0] > frame.tex_coords[2]:
-        #     arr = np.fliplr(arr)
+        bufs = self._rgb_bufs
+        for idx, (det, frame) in enumerate(zip(self._detectors, frames)):
+            bufs[idx] = det.texture_to_rgb(frame, out=bufs[idx])
+        return self.detect_rgb(bufs)
 
-        # Final flip so MediaPipe sees a top-left origin
-        arr = np.flipud(arr)
+    def detect_rgb(self, frames:Sequence[np.ndarray]) -> list[np.ndarray | None]:
+        if len(frames) != len(self._detectors):
+            raise ValueError(f"expected {len(self._detectors)} frames, got {len(frames)}")
 
-        return np.ascontiguousarray(arr)
+        futures = [
+            self._pool.submit(det.detect_rgb, frame)
+            for det, frame in zip(self._detectors, frames)
+        ]
+        return [future.result() for future in futures]
 
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
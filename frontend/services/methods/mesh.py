@@ -5,6 +5,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Iterable, Sequence
 
 import numpy as np
@@ -40,6 +41,9 @@ def build_mesh(points: Sequence[Sequence[float]]) -> TriangleMesh:
     ----------
     points:
         Iterable of (x, y) pairs in normalized coordinates.
+
+    Meshes are cached per point set, so repeated calls with the same control
+    points reuse one (read-only) triangulation.
     """
 
     pts = np.asarray(points, dtype=np.float32)
@@ -53,8 +57,15 @@ def build_mesh(points: Sequence[Sequence[float]]) -> TriangleMesh:
             "scipy is required for Delaunay triangulation; install scipy>=1.8"
         )
 
+    return _build_mesh_cached(pts.tobytes(), len(pts))
+
+
+@lru_cache(maxsize=32)
+def _build_mesh_cached(key: bytes, count: int) -> TriangleMesh:
+    pts = np.frombuffer(key, dtype=np.float32).reshape(count, 2)
     tri = Delaunay(pts)
     triangles = np.asarray(tri.simplices, dtype=np.int32)
+    triangles.flags.writeable = False
     return TriangleMesh(triangles=triangles)
 
 
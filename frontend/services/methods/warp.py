@@ -12,7 +12,7 @@ import numpy as np
 from .mesh import TriangleMesh, build_mesh
 from . import blend
 
-__all__ = ["warp_face", "piecewise_affine_warp"]
+__all__ = ["warp_face", "piecewise_affine_warp", "build_warp_maps"]
 
 
 def warp_face(
@@ -69,39 +69,96 @@ def piecewise_affine_warp(
     src_pixels: np.ndarray,
     dst_pixels: np.ndarray,
     mesh: TriangleMesh,
+    maps: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None,
 ) -> tuple[np.ndarray, np.ndarray]:
-    """Apply a piecewise-affine warp and return (warped_frame, mask)."""
-
-    h, w = frame.shape[:2]
-    frame_f = frame.astype(np.float32)
-    accumulator = np.zeros_like(frame_f, dtype=np.float32)
-    weight = np.zeros((h, w, 1), dtype=np.float32)
-
-    for tri in mesh.iter_indices():
-        src_tri = src_pixels[list(tri)].astype(np.float32)
-        dst_tri = dst_pixels[list(tri)].astype(np.float32)
-
-        # Warp entire frame for simplicity; mask will restrict blending region
-        warp_mat = cv2.getAffineTransform(src_tri, dst_tri)
-        warped_full = cv2.warpAffine(
-            frame_f,
-            warp_mat,
-            (w, h),
-            flags=cv2.INTER_LINEAR,
-            borderMode=cv2.BORDER_REFLECT_101,
-        )
+    """Apply a piecewise-affine warp and return (warped_frame, mask).
+
+    Each destination pixel is mapped back through the inverse affine of the
+    triangle that covers it, and the frame is resampled in a single
+    ``cv2.remap`` pass. Callers warping repeatedly with fixed control points can
+    pass *maps* from :func:`build_warp_maps` to skip rebuilding them; the mask
+    returned is then the one from *maps*.
+    """
+
+    if maps is None:
+        maps = build_warp_maps(src_pixels, dst_pixels, mesh, frame.shape[:2])
+    map_x, map_y, mask = maps
+
+    warped = cv2.remap(
+        frame.astype(np.float32),
+        map_x,
+        map_y,
+        interpolation=cv2.INTER_LINEAR,
+        borderMode=cv2.BORDER_REFLECT_101,
+    )
+    if warped.ndim == 2:
+        warped = warped[..., None]
+    warped *= mask
+    return warped, mask
+
+
+def build_warp_maps(
+    src_pixels: np.ndarray,
+    dst_pixels: np.ndarray,
+    mesh: TriangleMesh,
+    shape: tuple[int, int],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Build the (map_x, map_y, mask) sampling maps for one warp geometry.
+
+    Parameters
+    ----------
+    src_pixels, dst_pixels : np.ndarray
+        Matching (N, 2) control points in pixel coordinates.
+    mesh : TriangleMesh
+        Triangulation over the control points.
+    shape : tuple[int, int]
+        (height, width) of the frames the maps will be applied to.
+    """
+    height, width = shape[:2]
+    src = np.asarray(src_pixels, dtype=np.float32)
+    dst = np.asarray(dst_pixels, dtype=np.float32)
+    triangles = np.asarray(mesh.triangles, dtype=np.int32)
+
+    src_tris = src[triangles]
+    dst_tris = dst[triangles]
+
+    # Which triangle covers each destination pixel (-1: none)
+    labels = np.full((height, width), -1, dtype=np.int32)
+    for idx, dst_tri in enumerate(dst_tris):
+        cv2.fillConvexPoly(labels, dst_tri.astype(np.int32), int(idx))
+
+    # dst -> src affines: where each destination pixel samples from
+    inverse = _triangle_affines(dst_tris, src_tris)
 
-        tri_mask = np.zeros((h, w), dtype=np.float32)
-        cv2.fillConvexPoly(tri_mask, dst_tri.astype(np.int32), 1.0)
-        tri_mask = tri_mask[..., None]
+    ys, xs = np.nonzero(labels >= 0)
+    coeffs = inverse[labels[ys, xs]]
+    xs_f = xs.astype(np.float64)
+    ys_f = ys.astype(np.float64)
 
-        accumulator += warped_full * tri_mask
-        weight += tri_mask
+    map_x = np.full((height, width), -1.0, dtype=np.float32)
+    map_y = np.full((height, width), -1.0, dtype=np.float32)
+    map_x[ys, xs] = coeffs[:, 0, 0] * xs_f + coeffs[:, 0, 1] * ys_f + coeffs[:, 0, 2]
+    map_y[ys, xs] = coeffs[:, 1, 0] * xs_f + coeffs[:, 1, 1] * ys_f + coeffs[:, 1, 2]
 
-    weight = np.clip(weight, 1e-6, None)
-    warped = accumulator / weight
-    mask = np.clip(weight, 0.0, 1.0)
-    return warped.astype(np.float32), mask.astype(np.float32)
+    mask = (labels >= 0).astype(np.float32)[..., None]
+    return map_x, map_y, mask
+
+
+def _triangle_affines(src_tris: np.ndarray, dst_tris: np.ndarray) -> np.ndarray:
+    """Return the (T, 2, 3) affine maps taking each *src_tris* triangle onto *dst_tris*.
+
+    Solves all triangles in one batched call instead of one
+    ``cv2.getAffineTransform`` per triangle.
+    """
+    src_h = np.concatenate([src_tris, np.ones(src_tris.shape[:2] + (1,), dtype=np.float32)], axis=2)
+    try:
+        coeffs = np.linalg.solve(src_h.astype(np.float64), dst_tris.astype(np.float64))
+    except np.linalg.LinAlgError:
+        # Degenerate triangle somewhere; fall back to OpenCV per triangle.
+        return np.stack(
+            [cv2.getAffineTransform(s, d) for s, d in zip(src_tris, dst_tris)]
+        )
+    return np.transpose(coeffs, (0, 2, 1))
 
 
 def _to_pixel(points: np.ndarray, width: int, height: int) -> np.ndarray:
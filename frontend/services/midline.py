@@ -4,6 +4,8 @@
 
 from __future__ import annotations
 
+import math
+
 from services.config import Config
 from dataclasses import dataclass
 from typing import Sequence
@@ -68,16 +70,7 @@ class Midline():
             return None
 
         centroid = pts.mean(axis=0)
-        centered = pts - centroid
-
-        # PCA by SVD on the centered points
-        _, _, vh = np.linalg.svd(centered, full_matrices=False)
-        direction = vh[0]
-        if direction[1] < 0:
-            direction = -direction
-
-        direction /= np.linalg.norm(direction)
-        return Line2D(origin=centroid, direction=direction)
+        return Line2D(origin=centroid, direction=_principal_axis(pts - centroid))
 
     def midsagittal_perpendicular(self, landmark: Sequence[float], midline: Line2D) -> Line2D | None:
         """
@@ -103,3 +96,23 @@ class Midline():
         perp_direction /= np.linalg.norm(perp_direction)
 
         return Line2D(origin=point, direction=perp_direction)
+
+
+def _principal_axis(centered: np.ndarray) -> np.ndarray:
+    """
+    Return the unit principal axis of centered (N, 2) points, pointing towards +y.
+
+    Closed-form eigenvector of the 2x2 covariance matrix; equivalent to the first
+    right singular vector of an SVD but without the LAPACK call per frame.
+    """
+    dx = centered[:, 0]
+    dy = centered[:, 1]
+    sxx = float(np.dot(dx, dx))
+    syy = float(np.dot(dy, dy))
+    sxy = float(np.dot(dx, dy))
+
+    theta = 0.5 * math.atan2(2.0 * sxy, sxx - syy)
+    direction = np.array([math.cos(theta), math.sin(theta)], dtype=np.float32)
+    if direction[1] < 0:
+        direction = -direction
+    return direction
@@ -5,12 +5,13 @@
 from __future__ import annotations
 
 import numpy as np
+from functools import lru_cache
 from typing import Optional, Sequence, Tuple
 
 from services.config import Config
 from services.midline import Line2D
 
-from kivy.graphics import Color, Ellipse, InstructionGroup, Line
+from kivy.graphics import Color, InstructionGroup, Line, Mesh
 from kivy.graphics.texture import Texture
 from kivy.utils import get_color_from_hex
 
@@ -22,6 +23,17 @@ _COLOR_MAP = {
     "white": "#FFFFFF",
     "black": "#000000",
 }
+_COLOR_RGBA = {name: tuple(get_color_from_hex(hex_code)) for name, hex_code in _COLOR_MAP.items()}
+
+# Points are drawn as small triangle fans batched into one Mesh per layer.
+_POINT_SEGMENTS = 12
+_UNIT_CIRCLE = np.stack(
+    [
+        np.cos(np.linspace(0.0, 2.0 * np.pi, _POINT_SEGMENTS, endpoint=False)),
+        np.sin(np.linspace(0.0, 2.0 * np.pi, _POINT_SEGMENTS, endpoint=False)),
+    ],
+    axis=1,
+).astype(np.float32)
 
 
 class Overlay:
@@ -39,6 +51,12 @@ class Overlay:
             "segment": self._draw_segment,
         }
 
+        # Debug toggles are fixed once the config is built; snapshot them so draw()
+        # does a plain dict lookup per item instead of getattr on the config. This
+        # snapshot is the only source of truth: the Pipeline reads it via is_enabled().
+        self._debug_enabled: dict[str, bool] = {}
+        self.refresh_debug_flags()
+
         # Points (multiple layers keyed by debug/group)
         self._point_layers: dict[str, dict[str, object]] = {}
 
@@ -65,15 +83,30 @@ class Overlay:
     # ------------------------------------------------------------------ #
     # Public API
     # ------------------------------------------------------------------ #
+    def refresh_debug_flags(self) -> None:
+        """Re-read the cfg.debug toggles; call after changing them at runtime."""
+        self._debug_enabled = {
+            name: bool(value) for name, value in vars(self.cfg.debug).items()
+        }
+
+    def is_enabled(self, debug: str) -> bool:
+        """Return the snapshotted state of the cfg.debug toggle *debug*."""
+        return self._debug_enabled.get(debug, False)
+
+    def clear(self) -> None:
+        """Hide every overlay primitive without releasing the instructions."""
+        self._clear_points()
+        self._clear_lines()
+        self._clear_segments()
+        self._clear_polygons()
+
     def draw(self, frame: Texture, instructions: dict | Sequence[dict] | None) -> Texture:
         if (
-            not self.cfg.debug.show_debug
+            not self._debug_enabled.get("show_debug")
             or frame is None
             or not instructions
         ):
-            self._clear_points()
-            self._clear_lines()
-            self._clear_polygons()
+            self.clear()
             return frame
 
         self._line_slots_used.clear()
@@ -85,19 +118,18 @@ class Overlay:
         items = instructions if isinstance(instructions, (list, tuple)) else [instructions]
         items = sorted(items, key=lambda item: item.get("z", 0))
 
+        enabled = self._debug_enabled
+        layers = self._layers
         for item in items:
-            if not getattr(self.cfg.debug, item.get("debug", ""), False):
+            if not enabled.get(item.get("debug", "")):
                 continue
-            fn = self._layers.get(item.get("draw"))
+            fn = layers.get(item.get("draw"))
             if fn:
                 frame = fn(frame, item)
                 rendered = True
 
         if not rendered:
-            self._clear_points()
-            self._clear_lines()
-            self._clear_segments()
-            self._clear_polygons()
+            self.clear()
         else:
             self._clear_unused_points()
             self._clear_unused_lines()
@@ -122,10 +154,19 @@ class Overlay:
         key = overlay.get("group") or overlay.get("debug") or "default"
         layer = self._point_layers.get(key)
         if layer is None:
-            layer = {"group": None, "color": None, "ellipses": [], "used": False}
+            layer = {
+                "group": None,
+                "color": None,
+                "mesh": None,
+                "vertices": None,
+                "rim": None,
+                "radius": None,
+                "count": 0,
+                "used": False,
+            }
             self._point_layers[key] = layer
 
-        points = np.asarray(points, dtype=np.float32)
+        points = np.asarray(points, dtype=np.float32)[:, :2]
         color = _resolve_color(overlay.get("color"), self.cfg.overlay.pts_color)
         base_radius = float(overlay.get("size", self.cfg.overlay.pts_radius))
 
@@ -141,11 +182,10 @@ class Overlay:
         offset_x = (widget_w - display_w) / 2.0
         offset_y = (widget_h - display_h) / 2.0
         radius = max(1.0, base_radius * scale)
-        diameter = radius * 2.0
 
         layer_group = layer["group"]
         layer_color = layer["color"]
-        ellipses = layer["ellipses"]
+        mesh = layer["mesh"]
 
         if self._canvas is None and self.preview:
             self._canvas = self.preview.canvas.after
@@ -155,49 +195,65 @@ class Overlay:
         if layer_group is None:
             layer_group = InstructionGroup()
             layer_color = Color(*color)
+            mesh = Mesh(mode="triangles")
             layer_group.add(layer_color)
+            layer_group.add(mesh)
             self._canvas.add(layer_group)
             layer["group"] = layer_group
             layer["color"] = layer_color
+            layer["mesh"] = mesh
         else:
             layer_color.rgba = color
 
-        while len(ellipses) < len(points):
-            ell = Ellipse(size=(0, 0))
-            layer_group.add(ell)
-            ellipses.append(ell)
-
-        for idx, (x_norm, y_norm) in enumerate(points):
-            ell = ellipses[idx]
-            x_px = offset_x + x_norm * display_w
-            y_px = offset_y + (1.0 - y_norm) * display_h
-            ell.pos = (x_px - radius, y_px - radius)
-            ell.size = (diameter, diameter)
-
-        for idx in range(len(points), len(ellipses)):
-            ellipses[idx].size = (0, 0)
+        # All points of the layer go into a single Mesh (one draw call):
+        # per point a center vertex followed by its rim, as (x, y, u, v).
+        # The vertex buffer persists on the layer; u/v stay zero and only x/y are rewritten.
+        count = len(points)
+        vertices = layer["vertices"]
+        if vertices is None or len(vertices) != count:
+            vertices = np.zeros((count, _POINT_SEGMENTS + 1, 4), dtype=np.float32)
+            layer["vertices"] = vertices
+
+        # The radius only changes with the widget size, so the scaled rim is kept too.
+        rim = layer["rim"]
+        if layer["radius"] != radius:
+            rim = _UNIT_CIRCLE * np.float32(radius)
+            layer["rim"] = rim
+            layer["radius"] = radius
+
+        centers = vertices[:, 0, :2]
+        centers[...] = _to_widget_px(points, offset_x, offset_y, display_w, display_h)
+        np.add(centers[:, None, :], rim, out=vertices[:, 1:, :2])
+
+        # Mesh accepts a float memoryview, so the buffer is handed over without
+        # building a Python list; reassigning it flags the vertex data for upload.
+        mesh.vertices = memoryview(vertices.reshape(-1))
+        if layer["count"] != count:
+            mesh.indices = _point_mesh_indices(count)
+            layer["count"] = count
 
         layer["used"] = True
         return frame
 
     def _clear_points(self) -> None:
         for layer in self._point_layers.values():
-            color = layer.get("color")
-            if color:
-                r, g, b, _ = color.rgba
-                color.rgba = (r, g, b, 0)
-            for ell in layer.get("ellipses", []):
-                ell.size = (0, 0)
+            self._clear_point_layer(layer)
 
     def _clear_unused_points(self) -> None:
         for layer in self._point_layers.values():
             if not layer.get("used"):
-                color = layer.get("color")
-                if color:
-                    r, g, b, _ = color.rgba
-                    color.rgba = (r, g, b, 0)
-                for ell in layer.get("ellipses", []):
-                    ell.size = (0, 0)
+                self._clear_point_layer(layer)
+
+    @staticmethod
+    def _clear_point_layer(layer: dict) -> None:
+        color = layer.get("color")
+        if color:
+            r, g, b, _ = color.rgba
+            color.rgba = (r, g, b, 0)
+        mesh = layer.get("mesh")
+        if mesh is not None and layer.get("count"):
+            mesh.indices = []
+            layer["count"] = 0
     # ------------------------------------------------------------------ #
     # Polygon layer
     # ------------------------------------------------------------------ #
@@ -225,11 +281,7 @@ class Overlay:
         offset_x = (widget_w - display_w) / 2.0
         offset_y = (widget_h - display_h) / 2.0
 
-        coords: list[float] = []
-        for x_norm, y_norm in pts:
-            x_px = offset_x + x_norm * display_w
-            y_px = offset_y + (1.0 - y_norm) * display_h
-            coords.extend([x_px, y_px])
+        coords = _to_widget_px(pts, offset_x, offset_y, display_w, display_h).ravel().tolist()
 
         slot_value = overlay.get("slot")
         if slot_value is None:
@@ -309,11 +361,7 @@ class Overlay:
         offset_x = (widget_w - display_w) / 2.0
         offset_y = (widget_h - display_h) / 2.0
 
-        coords: list[float] = []
-        for x_norm, y_norm in pts:
-            x_px = offset_x + x_norm * display_w
-            y_px = offset_y + (1.0 - y_norm) * display_h
-            coords.extend([x_px, y_px])
+        coords = _to_widget_px(pts, offset_x, offset_y, display_w, display_h).ravel().tolist()
 
         slot_value = overlay.get("slot")
         if slot_value is None:
@@ -482,11 +530,53 @@ class Overlay:
         return pts[i_min], pts[i_max]
 
 
+def _to_widget_px(
+    pts: np.ndarray,
+    offset_x: float,
+    offset_y: float,
+    display_w: float,
+    display_h: float,
+) -> np.ndarray:
+    """Map normalized (N, 2) image coordinates to widget pixels (y flipped)."""
+    px = np.empty((len(pts), 2), dtype=np.float32)
+    np.multiply(pts[:, 0], display_w, out=px[:, 0])
+    px[:, 0] += offset_x
+    np.subtract(1.0, pts[:, 1], out=px[:, 1])
+    px[:, 1] *= display_h
+    px[:, 1] += offset_y
+    return px
+
+
+@lru_cache(maxsize=16)
+def _point_mesh_indices(count: int) -> list[int]:
+    """Triangle indices for `count` point fans laid out as center + rim vertices."""
+    stride = _POINT_SEGMENTS + 1
+    rim = np.arange(_POINT_SEGMENTS)
+    fan = np.empty((_POINT_SEGMENTS, 3), dtype=np.int64)
+    fan[:, 0] = 0
+    fan[:, 1] = 1 + rim
+    fan[:, 2] = 1 + (rim + 1) % _POINT_SEGMENTS
+    starts = np.arange(count)[:, None, None] * stride
+    return (fan[None, :, :] + starts).ravel().tolist()
+
+
 def _resolve_color(value: str | tuple | list, fallback) -> tuple[float, float, float, float]:
+    # Instruction colors repeat every frame; lists are made hashable so the cache applies.
+    if isinstance(value, list):
+        value = tuple(value)
+    elif not isinstance(value, (str, tuple)):
+        value = None
+    return _resolve_color_cached(value, fallback)
+
+
+@lru_cache(maxsize=64)
+def _resolve_color_cached(value: str | tuple | None, fallback) -> tuple[float, float, float, float]:
     if isinstance(value, str):
-        hex_code = _COLOR_MAP.get(value.lower(), value)
-        return get_color_from_hex(hex_code)
-    if isinstance(value, (tuple, list)):
+        rgba = _COLOR_RGBA.get(value.lower())
+        if rgba is not None:
+            return rgba
+        return tuple(get_color_from_hex(value))
+    if isinstance(value, tuple):
         if max(value) > 1.0:
             rgb = [c / 255.0 for c in value[:3]]
             alpha = value[3] / 255.0 if len(value) == 4 else 1.0
@@ -494,5 +584,5 @@ def _resolve_color(value: str | tuple | list, fallback) -> tuple[float, float, f
             rgb = list(value[:3])
             alpha = value[3] if len(value) == 4 else 1.0
         return (*rgb, alpha)
-    return get_color_from_hex(fallback)
+    return tuple(get_color_from_hex(fallback))
 
@@ -4,6 +4,8 @@
 
 from __future__ import annotations
 
+import threading
+
 import numpy as np
 
 from typing import Optional
@@ -15,6 +17,7 @@ from services.midline import Line2D, Midline
 from services.overlay import Overlay
 from services.calculate import compute_asymmetry_metrics
 from kivy.graphics.texture import Texture
+from kivy.logger import Logger
 
 # Flip map to properly map debugging points
 FLIP_MAP = {l: r for l, r in nodes.LEFT_RIGHT_PAIRS}
@@ -109,8 +112,60 @@ class Pipeline:
 
 
         self._last_landmarks: Optional[np.ndarray] = None
+        # Whether the newest detection result had a face; _last_landmarks stays
+        # sticky for the metrics, but the overlay should not draw a lost face.
+        self._face_visible = False
         self._last_midline: Optional[Line2D] = None
         self._last_metrics = None
+        self._mirror_buf: Optional[np.ndarray] = None
+        self._overlay_visible = False
+        # Debug toggles are read through overlay.is_enabled() so the Pipeline and the
+        # Overlay share one snapshot; runtime changes go through refresh_debug_flags().
+        # Horizontally flipped view of the camera texture, rebuilt only when the
+        # camera hands over a different texture object.
+        self._flip_source: Optional[Texture] = None
+        self._flip_view: Optional[Texture] = None
+
+        # Landmark detection runs on a worker thread with one frame of latency:
+        # frame N is displayed with the newest finished result (usually frame N-1)
+        # while frame N is being detected. The pending slot holds a single frame
+        # and is overwritten, so a slow detector always picks up the newest one.
+        self._det_cond = threading.Condition()
+        self._det_pending: Optional[np.ndarray] = None
+        self._det_result: Optional[np.ndarray] = None
+        self._det_ready = False
+        self._det_running = True
+        # RGB buffers not currently being filled, pending, or detected on
+        self._rgb_free: list[np.ndarray] = []
+        self._det_thread = threading.Thread(target=self._det_loop, name="face-mesh", daemon=True)
+        self._det_thread.start()
+
+        # Overlay instructions have a fixed schema; build them once and only
+        # swap in the per-frame geometry.
+        self._instr_points: dict = {
+            "draw": "points",
+            "debug": "landmarks",
+            "location": None,
+            "color": cfg.overlay.pts_color,
+            "size": cfg.overlay.pts_radius,
+        }
+        self._instr_midline: dict = {
+            "draw": "line",
+            "debug": "midline",
+            "line": None,
+            "slot": 0,
+            "color": cfg.overlay.midline_color,
+            "width": cfg.overlay.midline_width,
+        }
+        self._instr_perpendicular: dict = {
+            "draw": "line",
+            "debug": "perpendicular",
+            "line": None,
+            "slot": 1,
+            "color": cfg.overlay.perp_color,
+            "width": cfg.overlay.perp_width,
+        }
+        self._instr_list: list[dict] = []
 
     # ------------------------------------------------------------------ #
     # Public API
@@ -128,8 +183,18 @@ class Pipeline:
             except Exception:
                 midline_raw = None
 
-        display_landmarks = self._mirror_landmarks_if_needed(landmarks)
-        midline_display, perpendicular = self._compute_midline_overlays(display_landmarks)
+        # Mirrored landmarks and the display midline only feed the debug overlay.
+        display_landmarks: Optional[np.ndarray] = None
+        midline_display: Optional[Line2D] = None
+        perpendicular: Optional[Line2D] = None
+        show_overlay = (
+            self.overlay is not None and self.overlay.is_enabled("show_debug") and self._face_visible
+        )
+        if show_overlay:
+            display_landmarks = self._mirror_landmarks_if_needed(landmarks)
+            midline_display, perpendicular = self._compute_midline_overlays(display_landmarks)
+        else:
+            self._last_midline = None
 
         pose_ok = self._pose_within_limits(landmarks)
         metrics = None
@@ -140,16 +205,35 @@ class Pipeline:
 
         processed_frame = self._flip_texture_if_needed(frame)
 
-        if self.overlay:
-            instructions = self._build_overlay_instructions(display_landmarks, midline_display, perpendicular) or []
-            if getattr(self.cfg.debug, "displacements", False) and metrics is not None and midline_raw is not None:
-                midline_overlay = midline_display or self._mirror_line_if_needed(midline_raw)
-                instructions.extend(self._build_displacement_overlay(metrics, midline_overlay))
-            if instructions:
-                self.overlay.draw(processed_frame, instructions)
+        if not show_overlay:
+            # Release mode or no face: skip the overlay entirely, clearing it once so
+            # nothing stale is left on screen.
+            if self._overlay_visible:
+                self.overlay.clear()
+                self._overlay_visible = False
+            return processed_frame
+
+        instructions = self._build_overlay_instructions(display_landmarks, midline_display, perpendicular) or []
+        if self.overlay.is_enabled("displacements") and metrics is not None and midline_raw is not None:
+            midline_overlay = midline_display or self._mirror_line_if_needed(midline_raw)
+            instructions.extend(self._build_displacement_overlay(metrics, midline_overlay))
+        if instructions:
+            self.overlay.draw(processed_frame, instructions)
+            self._overlay_visible = True
+        elif self._overlay_visible:
+            self.overlay.clear()
+            self._overlay_visible = False
 
         return processed_frame
 
+    def close(self) -> None:
+        """Stop the landmark detection worker."""
+        with self._det_cond:
+            self._det_running = False
+            self._det_pending = None
+            self._det_cond.notify()
+        self._det_thread.join(timeout=1.0)
+
     # ------------------------------------------------------------------ #
     # Landmark handling
     # ------------------------------------------------------------------ #
@@ -272,18 +356,59 @@ class Pipeline:
         return point
 
     def _detect_landmarks(self, frame: Texture) -> Optional[np.ndarray]:
-        landmarks = self.detector.detect(frame)
-        if landmarks is not None:
-            self._last_landmarks = landmarks
-        else:
-            landmarks = self._last_landmarks
-        return landmarks
+        # Pixel readback has to happen here on the GL thread; MediaPipe does not.
+        with self._det_cond:
+            buf = self._rgb_free.pop() if self._rgb_free else None
+        rgb = self.detector.texture_to_rgb(frame, out=buf)
+        with self._det_cond:
+            if self._det_pending is not None:
+                self._rgb_free.append(self._det_pending)
+            self._det_pending = rgb
+            ready, result = self._det_ready, self._det_result
+            self._det_ready, self._det_result = False, None
+            self._det_cond.notify()
+
+        if ready:
+            self._face_visible = result is not None
+            if result is not None:
+                self._last_landmarks = result
+        return self._last_landmarks
+
+    def _det_loop(self) -> None:
+        failing = False
+        while True:
+            with self._det_cond:
+                while self._det_running and self._det_pending is None:
+                    self._det_cond.wait()
+                if not self._det_running:
+                    return
+                rgb = self._det_pending
+                self._det_pending = None
+
+            try:
+                landmarks = self.detector.detect_rgb(rgb)
+            except Exception:
+                # Keep the worker alive, but report the first failure of a streak
+                # instead of letting the overlay silently freeze.
+                if not failing:
+                    Logger.exception("Pipeline: landmark detection failed")
+                failing = True
+                landmarks = None
+            else:
+                failing = False
+            with self._det_cond:
+                self._det_result = landmarks
+                self._det_ready = True
+                self._rgb_free.append(rgb)
 
     def _mirror_landmarks_if_needed(self, landmarks: Optional[np.ndarray]) -> Optional[np.ndarray]:
         if landmarks is None or not self._camera_hflip_enabled():
             return landmarks
-        mirrored = landmarks.copy()
-        mirrored[:, 0] = 1.0 - mirrored[:, 0]
+        mirrored = self._mirror_buf
+        if mirrored is None or mirrored.shape != landmarks.shape or mirrored.dtype != landmarks.dtype:
+            mirrored = self._mirror_buf = np.empty_like(landmarks)
+        np.copyto(mirrored, landmarks)
+        np.subtract(1.0, landmarks[:, 0], out=mirrored[:, 0])
         return mirrored
 
     def _mirror_line_if_needed(self, line: Optional[Line2D]) -> Optional[Line2D]:
@@ -337,14 +462,20 @@ class Pipeline:
     def _flip_texture_if_needed(self, frame: Texture) -> Texture:
         if not self._camera_hflip_enabled():
             return frame
-        flipped = frame.get_region(0, 0, frame.width, frame.height)
-        flipped.flip_horizontal()
-        return flipped
+        # A region shares the GL texture with its source, so the view stays current
+        # as the camera blits new frames into it. The source's own tex_coords are
+        # left alone because detection and capture read pixels through them.
+        if frame is not self._flip_source:
+            flipped = frame.get_region(0, 0, frame.width, frame.height)
+            flipped.flip_horizontal()
+            self._flip_source = frame
+            self._flip_view = flipped
+        return self._flip_view
 
     def _region_polygons(self, landmarks: Optional[np.ndarray]) -> list[dict]:
         if (
             landmarks is None
-            or not getattr(self.cfg.debug, "regions", False)
+            or not self.overlay.is_enabled("regions")
             or not self._region_groups
         ):
             return []
@@ -486,42 +617,26 @@ class Pipeline:
         midline: Optional[Line2D],
         perpendicular: Optional[Line2D],
     ) -> Optional[list[dict]]:
-        if not self.cfg.debug.show_debug or landmarks is None:
+        if not self.overlay.is_enabled("show_debug") or landmarks is None:
             return None
 
-        instructions: list[dict] = [
-            {
-                "draw": "points",
-                "debug": "landmarks",
-                "location": landmarks[:, :2],
-                "color": self.cfg.overlay.pts_color,
-                "size": self.cfg.overlay.pts_radius,
-            }
-        ]
-
-        if getattr(self.cfg.debug, "midline", True) and midline is not None:
-            instructions.append(
-                {
-                    "draw": "line",
-                    "debug": "midline",
-                    "line": midline,
-                    "slot": 0,
-                    "color": self.cfg.overlay.midline_color,
-                    "width": self.cfg.overlay.midline_width,
-                }
-            )
+        instructions = self._instr_list
+        instructions.clear()
 
-        if getattr(self.cfg.debug, "midline_perp", True) and perpendicular is not None:
-            instructions.append(
-                {
-                    "draw": "line",
-                    "debug": "perpendicular",
-                    "line": perpendicular,
-                    "slot": 1,
-                    "color": self.cfg.overlay.perp_color,
-                    "width": self.cfg.overlay.perp_width,
-                }
-            )
+        # Gate here rather than in Overlay.draw so hidden landmarks cost nothing.
+        if self.overlay.is_enabled("landmarks"):
+            self._instr_points["location"] = landmarks[:, :2]
+            instructions.append(self._instr_points)
+        else:
+            self._instr_points["location"] = None
+
+        if self.overlay.is_enabled("midline") and midline is not None:
+            self._instr_midline["line"] = midline
+            instructions.append(self._instr_midline)
+
+        if self.overlay.is_enabled("perpendicular") and perpendicular is not None:
+            self._instr_perpendicular["line"] = perpendicular
+            instructions.append(self._instr_perpendicular)
 
         instructions.extend(self._region_polygons(landmarks))
 
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Callable, Optional
 
+import numpy as np
+from PIL import Image
+
 from . import db
 from .photo_storage import (
     ensure_session_directory,
@@ -11,10 +16,46 @@ from .photo_storage import (
     pose_capture_path,
 )
 from kivy.graphics.texture import Texture
+from kivy.logger import Logger
 
 
 MAX_POSES = 9
 
+# Upper bound on captures waiting for the background writer; further captures
+# block until a slot frees up instead of queueing frames without limit.
+MAX_PENDING_WRITES = 2
+
+# zlib level 1 encodes several times faster than Pillow's default (6) for
+# camera frames at the cost of slightly larger files.
+PNG_COMPRESS_LEVEL = 1
+
+
+def _mirror_rgba(pixels: bytes, size: tuple[int, int]) -> bytes:
+    """Return *pixels* (tightly packed RGBA rows) flipped left-to-right."""
+    width, height = size
+    arr = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 4)
+    return np.ascontiguousarray(arr[:, ::-1, :]).tobytes()
+
+
+def _write_rgba_image(
+    pixels: bytes,
+    size: tuple[int, int],
+    file_path: Path,
+    mirror: bool = False,
+) -> None:
+    """Encode raw RGBA *pixels* in the format implied by *file_path*'s suffix."""
+    if mirror:
+        pixels = _mirror_rgba(pixels, size)
+    image = Image.frombytes("RGBA", size, pixels)
+    image_format = Image.registered_extensions().get(file_path.suffix.lower(), "PNG")
+    if image_format == "PNG":
+        image.save(file_path, "PNG", optimize=False, compress_level=PNG_COMPRESS_LEVEL)
+        return
+    if image_format == "JPEG":
+        # JPEG has no alpha channel.
+        image = image.convert("RGB")
+    image.save(file_path, image_format)
+
 
 @dataclass
 class SessionState:
@@ -45,6 +86,15 @@ class SessionManager:
         self._on_session_complete = on_session_complete
         self._state: SessionState | None = None
 
+        # Encoding and disk writes run on a single worker so captures return
+        # immediately on the UI thread.
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pose-io")
+        self._io_slots = threading.BoundedSemaphore(MAX_PENDING_WRITES)
+        self._pending_writes: list[Future] = []
+        # Most recent write per file, so a failed write only drops its database
+        # row if no newer capture has replaced it in the meantime.
+        self._latest_writes: dict[Path, Future] = {}
+
     @property
     def state(self) -> SessionState | None:
         return self._state
@@ -68,16 +118,17 @@ class SessionManager:
 
     def resume_session(self, session_id: int) -> SessionState:
         """Load session progress based on stored pose photos."""
-        # Determine last completed pose to resume properly.
-        rows = db.fetch_pose_photos_for_session(self._db_path, session_id)
-        last_pose = max((pose for pose, *_ in rows), default=0)
-
         conn_state = db._connect(self._db_path)
         with conn_state:
             session_row = conn_state.execute(
                 "SELECT session_start, user_id, notes, is_complete FROM sessions WHERE id = ?",
                 (session_id,),
             ).fetchone()
+            # Determine last completed pose to resume properly.
+            (last_pose,) = conn_state.execute(
+                "SELECT COALESCE(MAX(pose_index), 0) FROM pose_photos WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
 
         if not session_row:
             raise ValueError(f"Session {session_id} does not exist")
@@ -104,7 +155,13 @@ class SessionManager:
     def _assert_session_active(self) -> SessionState:
         if not self._state:
             raise RuntimeError("No active session. Call start_session() first.")
-        return self._state
+        state = self._state
+        if state.session_dir is None:
+            # Materialize once so captures never touch the filesystem for it again.
+            state.session_dir = ensure_session_directory(
+                self._root_dir, state.session_id, state.session_start
+            )
+        return state
 
     def capture_pose(self, image_bytes: bytes, pose_index: int | None = None) -> Path:
         """
@@ -118,53 +175,137 @@ class SessionManager:
         if pose < 1 or pose > MAX_POSES:
             raise ValueError("pose_index must be between 1 and 9")
 
-        session_dir = state.session_dir or ensure_session_directory(
-            self._root_dir, state.session_id, state.session_start
-        )
+        session_dir = state.session_dir
 
         file_path = pose_capture_path(session_dir, pose)
-        file_path.write_bytes(image_bytes)
-
-        return self._record_pose(state, pose, file_path, pose_index is None)
+        return self._record_pose(
+            state, pose, file_path, pose_index is None, file_path.write_bytes, image_bytes
+        )
 
     def capture_pose_texture(
         self,
         texture: Texture,
         pose_index: int | None = None,
         extension: str = "png",
+        mirror: bool = False,
     ) -> Path:
+        """
+        Persist *texture* as the photo for the current (or given) pose.
+
+        Photos are saved in camera orientation, ignoring any preview flip stored in
+        ``tex_coords``, so sessions stay comparable; pass *mirror* to flip them.
+        """
         state = self._assert_session_active()
 
         pose = pose_index or state.current_pose
         if pose < 1 or pose > MAX_POSES:
             raise ValueError("pose_index must be between 1 and 9")
 
-        session_dir = state.session_dir or ensure_session_directory(
-            self._root_dir, state.session_id, state.session_start
-        )
+        session_dir = state.session_dir
 
         file_path = pose_capture_path(session_dir, pose, extension=extension)
-        capture_texture = texture.get_region(0, 0, texture.width, texture.height)
-        capture_texture.save(str(file_path), flipped=False)
-
-        return self._record_pose(state, pose, file_path, pose_index is None)
+        # Pixel readback has to happen on the GL thread; the flip and encode do not.
+        return self._record_pose(
+            state,
+            pose,
+            file_path,
+            pose_index is None,
+            _write_rgba_image,
+            texture.pixels,
+            texture.size,
+            file_path,
+            mirror,
+        )
 
     def finish_session(self) -> None:
         state = self._assert_session_active()
         if state.completed:
             return
 
+        # Listeners typically display the captured photos, so make sure they exist.
+        self.flush_writes()
         db.mark_session_complete(self._db_path, state.session_id)
         state.completed = True
         if self._on_session_complete:
             self._on_session_complete(state)
 
+    def flush_writes(self) -> None:
+        """
+        Block until all queued photo writes have finished.
+
+        Every failure is logged as it happens; the first one is re-raised here.
+        """
+        pending, self._pending_writes = self._pending_writes, []
+        first_error: BaseException | None = None
+        for future in pending:
+            error = future.exception()
+            if error is not None and first_error is None:
+                first_error = error
+        if first_error is not None:
+            raise first_error
+
+    def close(self) -> None:
+        """Finish outstanding photo writes and stop the background writer."""
+        try:
+            self.flush_writes()
+        finally:
+            self._io_pool.shutdown(wait=True)
+
+    def _submit_write(
+        self,
+        state: SessionState,
+        pose: int,
+        file_path: Path,
+        fn: Callable[..., object],
+        *args: object,
+    ) -> Future:
+        self._io_slots.acquire()
+        try:
+            future = self._io_pool.submit(fn, *args)
+        except BaseException:
+            self._io_slots.release()
+            raise
+        self._latest_writes[file_path] = future
+        future.add_done_callback(
+            lambda f: self._on_write_done(f, state.session_id, pose, file_path)
+        )
+        # Drop finished writes but keep failures around for flush_writes() to report.
+        self._pending_writes = [
+            f for f in self._pending_writes if not f.done() or f.exception() is not None
+        ]
+        self._pending_writes.append(future)
+        return future
+
+    def _on_write_done(
+        self, future: Future, session_id: int, pose: int, file_path: Path
+    ) -> None:
+        try:
+            error = future.exception()
+            if error is None:
+                return
+            Logger.error(
+                "SessionManager: failed to write pose %d photo to %s: %r",
+                pose,
+                file_path,
+                error,
+            )
+            # The pose row was recorded when the capture was queued; don't leave
+            # it pointing at a file that was never written.
+            if self._latest_writes.get(file_path) is future:
+                db.delete_pose_photo(self._db_path, session_id, pose, str(file_path))
+        except Exception:
+            Logger.exception("SessionManager: failed to clean up pose %d", pose)
+        finally:
+            self._io_slots.release()
+
     def _record_pose(
         self,
         state: SessionState,
         pose: int,
         file_path: Path,
         auto_advance: bool,
+        write_fn: Callable[..., object],
+        *write_args: object,
         symmetry_score: float | None = None,
     ) -> Path:
         db.upsert_pose_photo(
@@ -174,6 +315,8 @@ class SessionManager:
             photo_path=str(file_path),
             symmetry_score=symmetry_score,
         )
+        # Queue the write only once the row exists, so a failed write can remove it.
+        self._submit_write(state, pose, file_path, write_fn, *write_args)
 
         if self._on_pose_complete:
             self._on_pose_complete(state, pose, file_path)
@@ -2,10 +2,12 @@ import cv2
 import numpy as np
 
 from frontend.services.methods.mesh import build_mesh
-from frontend.services.methods.warp import piecewise_affine_warp
+from frontend.services.methods.warp import build_warp_maps, piecewise_affine_warp
 from frontend.services.methods.blend import blend_with_mask
 
 WIDTH = HEIGHT = 64
+INV_W = np.float32(1.0 / WIDTH)
+INV_H = np.float32(1.0 / HEIGHT)
 
 # Base image with a red square (reference)
 base = np.zeros((HEIGHT, WIDTH, 3), np.uint8)
@@ -25,12 +27,12 @@ pixel_src = np.array([
 
 # Convert to math-space normalized coordinates (+x right, +y up)
 src = np.zeros_like(pixel_src)
-src[:, 0] = pixel_src[:, 0] / WIDTH
-src[:, 1] = 1.0 - (pixel_src[:, 1] / HEIGHT)
+src[:, 0] = pixel_src[:, 0] * INV_W
+src[:, 1] = 1.0 - (pixel_src[:, 1] * INV_H)
 
 # Desired offsets in math space
-shift_x = 5 / WIDTH
-shift_y = 4 / HEIGHT
+shift_x = 5 * INV_W
+shift_y = 4 * INV_H
 print(f"Math-space shift -> x: {shift_x:+.4f} (right positive), y: {shift_y:+.4f} (up positive)")
 
 dst = src.copy()
@@ -42,7 +44,9 @@ src_px = np.column_stack((src[:, 0] * WIDTH, (1.0 - src[:, 1]) * HEIGHT))
 dst_px = np.column_stack((dst[:, 0] * WIDTH, (1.0 - dst[:, 1]) * HEIGHT))
 
 mesh = build_mesh(src)
-warped_patch, mask = piecewise_affine_warp(warp_src, src_px, dst_px, mesh)
+# The geometry is fixed, so the sampling maps are built once and reused per warp
+maps = build_warp_maps(src_px, dst_px, mesh, warp_src.shape[:2])
+warped_patch, mask = piecewise_affine_warp(warp_src, src_px, dst_px, mesh, maps=maps)
 result = blend_with_mask(base, warped_patch, mask)
 
 cv2.imwrite("debug_warp.png", result)